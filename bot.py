@@ -1,39 +1,32 @@
 import asyncio
 import os
-import uuid
+import secrets
 import tempfile
 from datetime import datetime, timedelta
+from functools import lru_cache
 from typing import Optional, Dict, Any, List
 import mimetypes
 
+# Pay the mime.types parse at import, not on the first user's upload
+mimetypes.init()
+
 from pyrogram import Client, filters
 from pyrogram.types import Message, InlineKeyboardMarkup, InlineKeyboardButton, CallbackQuery
 from pyrogram.enums import ChatAction
 import aiofiles
+import aiofiles.os
 
 from database import db
 from wasabi_storage import storage
+from bot_utils import ProgressState, format_file_size, save_user_info
 
-class TelegramFileBot:
-    def __init__(self):
-        self.app = Client(
-            "filebot",
-            api_id=os.getenv('API_ID'),
-            api_hash=os.getenv('API_HASH'),
-            bot_token=os.getenv('BOT_TOKEN')
-        )
-        
-        # Register handlers
-        self.setup_handlers()
-    
-    def setup_handlers(self):
-        """Setup bot command and message handlers"""
-        
-        @self.app.on_message(filters.command("start"))
-        async def start_command(client, message: Message):
-            await self.save_user_info(message.from_user)
-            
-            welcome_text = """
+@lru_cache(maxsize=256)
+def _guess_mime(ext: str) -> Optional[str]:
+    """Memoized mimetypes lookup keyed by lowercase extension"""
+    return mimetypes.guess_type('x' + ext)[0]
+
+# Static replies and keyboards, built once at import
+_WELCOME_TEXT = """
 🚀 **Welcome to Telegram File Bot!**
 
 📁 **Features:**
@@ -56,19 +49,15 @@ class TelegramFileBot:
 
 Just send any file to upload it instantly!
             """
-            
-            keyboard = InlineKeyboardMarkup([
-                [InlineKeyboardButton("📤 Upload File", callback_data="upload")],
-                [InlineKeyboardButton("📁 My Files", callback_data="list_files")],
-                [InlineKeyboardButton("🔍 Search Files", callback_data="search")],
-                [InlineKeyboardButton("🔗 Shared Files", callback_data="shared_files")]
-            ])
-            
-            await message.reply_text(welcome_text, reply_markup=keyboard)
-        
-        @self.app.on_message(filters.command("help"))
-        async def help_command(client, message: Message):
-            help_text = """
+
+_START_KEYBOARD = InlineKeyboardMarkup([
+    [InlineKeyboardButton("📤 Upload File", callback_data="upload")],
+    [InlineKeyboardButton("📁 My Files", callback_data="list_files")],
+    [InlineKeyboardButton("🔍 Search Files", callback_data="search")],
+    [InlineKeyboardButton("🔗 Shared Files", callback_data="shared_files")]
+])
+
+_HELP_TEXT = """
 📖 **Bot Commands:**
 
 **File Management:**
@@ -97,7 +86,30 @@ Just send any file to upload it instantly!
 Videos, Audio, Documents, Photos, Archives
 Maximum file size: 4GB
             """
-            await message.reply_text(help_text)
+
+class TelegramFileBot:
+    def __init__(self):
+        self.app = Client(
+            "filebot",
+            api_id=os.getenv('API_ID'),
+            api_hash=os.getenv('API_HASH'),
+            bot_token=os.getenv('BOT_TOKEN')
+        )
+        
+        # Register handlers
+        self.setup_handlers()
+    
+    def setup_handlers(self):
+        """Setup bot command and message handlers"""
+        
+        @self.app.on_message(filters.command("start"))
+        async def start_command(client, message: Message):
+            await self.save_user_info(message.from_user)
+            await message.reply_text(_WELCOME_TEXT, reply_markup=_START_KEYBOARD)
+
+        @self.app.on_message(filters.command("help"))
+        async def help_command(client, message: Message):
+            await message.reply_text(_HELP_TEXT)
         
         @self.app.on_message(filters.command("test"))
         async def test_command(client, message: Message):
@@ -228,13 +240,7 @@ Maximum file size: 4GB
     
     async def save_user_info(self, user):
         """Save user information to database"""
-        user_data = {
-            'user_id': user.id,
-            'username': user.username,
-            'first_name': user.first_name,
-            'last_name': user.last_name
-        }
-        await db.save_user(user_data)
+        await save_user_info(user)
     
     async def process_file_upload(self, message: Message):
         """Process file upload to cloud storage"""
@@ -260,23 +266,60 @@ Maximum file size: 4GB
             await message.reply_text("❌ File too large! Maximum size is 4GB")
             return
         
-        file_id = str(uuid.uuid4())
+        file_id = secrets.token_urlsafe(12)
         status_msg = await message.reply_text("📤 Uploading to cloud storage...")
-        
+        temp_path = None
+
         try:
-            # Download file from Telegram
+            # Download file from Telegram. Pyrogram spools to
+            # "<target>.temp" next to the target and renames it into
+            # place, so the target must be a real filesystem path
             with tempfile.NamedTemporaryFile(delete=False) as temp_file:
-                await message.download(temp_file.name)
                 temp_path = temp_file.name
-            
+            await message.download(temp_path)
+
             # Upload to Wasabi
             wasabi_key = f"files/{file_id}/{file_info.file_name or 'unnamed'}"
             
-            async def progress_callback(current, total):
-                progress = (current / total) * 100
-                await status_msg.edit_text(f"📤 Uploading: {progress:.1f}%")
-            
-            success = await storage.upload_file(temp_path, wasabi_key)
+            # The callback just counts bytes; one ticker task owns all
+            # status edits, so Telegram sees at most one every 2 seconds
+            # however fast boto3 fires
+            state = ProgressState()
+            total = getattr(file_info, 'file_size', 0)
+
+            def progress_callback(bytes_transferred):
+                # Storage callbacks report cumulative totals, so this is
+                # a plain store — atomic even from boto3 worker threads
+                state.bytes = bytes_transferred
+
+            async def progress_ticker():
+                last_text = None
+                while True:
+                    await asyncio.sleep(2)
+                    if not state.bytes or not total:
+                        continue
+                    text = f"📤 Uploading: {state.bytes / total * 100:.1f}%"
+                    if text == last_text:
+                        continue
+                    last_text = text
+                    try:
+                        await status_msg.edit_text(text)
+                    except Exception:
+                        pass  # never let a failed edit kill the upload
+
+            ticker = asyncio.create_task(progress_ticker())
+            try:
+                success = await storage.upload_file(
+                    temp_path, wasabi_key, progress_callback
+                )
+            finally:
+                # No edit may still be in flight when the final
+                # completion/error edit below runs
+                ticker.cancel()
+                try:
+                    await ticker
+                except asyncio.CancelledError:
+                    pass
             
             if success:
                 # Save file metadata to database
@@ -286,7 +329,8 @@ Maximum file size: 4GB
                     'wasabi_key': wasabi_key,
                     'original_name': file_info.file_name or 'unnamed',
                     'file_size': getattr(file_info, 'file_size', 0),
-                    'mime_type': getattr(file_info, 'mime_type', mimetypes.guess_type(file_info.file_name or '')[0]),
+                    'mime_type': getattr(file_info, 'mime_type', None) or _guess_mime(
+                        os.path.splitext(file_info.file_name or '')[1].lower()),
                     'uploader_id': message.from_user.id,
                     'uploader_username': message.from_user.username,
                     'metadata': {
@@ -321,12 +365,17 @@ Maximum file size: 4GB
                 )
             else:
                 await status_msg.edit_text("❌ Upload failed! Please try again.")
-            
-            # Clean up temp file
-            os.unlink(temp_path)
-            
+
         except Exception as e:
             await status_msg.edit_text(f"❌ Upload error: {str(e)}")
+        finally:
+            if temp_path:
+                # Async removal keeps the unlink syscall off the event loop,
+                # and the error path no longer leaks the temp file
+                try:
+                    await aiofiles.os.remove(temp_path)
+                except FileNotFoundError:
+                    pass
     
     async def list_user_files(self, message: Message):
         """List user's uploaded files"""
@@ -548,16 +597,7 @@ Maximum file size: 4GB
     
     def format_file_size(self, size_bytes: int) -> str:
         """Format file size in human readable format"""
-        if size_bytes == 0:
-            return "0B"
-        
-        size_names = ["B", "KB", "MB", "GB", "TB"]
-        i = 0
-        while size_bytes >= 1024 and i < len(size_names) - 1:
-            size_bytes /= 1024.0
-            i += 1
-        
-        return f"{size_bytes:.1f}{size_names[i]}"
+        return format_file_size(size_bytes)
     
     def start_bot(self):
         """Start the bot synchronously"""
@@ -0,0 +1,58 @@
+"""Helpers shared by the bot entry points (simple_bot.py and bot.py).
+
+Both bots grew their own copies of these; keeping one implementation here
+means one module to parse at startup and one place to tune the hot paths.
+"""
+import logging
+import os
+
+from database import db
+
+logger = logging.getLogger("filebot")
+
+PUBLIC_DOMAIN = os.getenv("PUBLIC_DOMAIN")  # e.g., mybot.onrender.com
+DOMAIN_PREFIX = f"https://{PUBLIC_DOMAIN}" if PUBLIC_DOMAIN else None
+
+_SIZE_NAMES = ("B", "KB", "MB", "GB", "TB")
+
+def format_file_size(size_bytes: int) -> str:
+    if not size_bytes:
+        return "0B"
+    # Unit index straight from the bit length — no divide loop
+    i = min((size_bytes.bit_length() - 1) // 10, 4)
+    return f"{size_bytes / (1 << (i * 10)):.1f}{_SIZE_NAMES[i]}"
+
+def get_domain_url(path: str = "") -> str:
+    if not DOMAIN_PREFIX:
+        return None
+    return DOMAIN_PREFIX + path if path else DOMAIN_PREFIX
+
+async def ensure_db_connected():
+    if not getattr(db, "pool", None):
+        await db.connect()
+
+class ProgressState:
+    """Latest transferred byte count, written by upload callbacks.
+
+    Callbacks (often on boto3 worker threads) only touch the one slot —
+    an attribute store is atomic under the GIL — while a ticker task
+    reads, formats and edits the status message at its own cadence.
+    """
+    __slots__ = ("bytes",)
+
+    def __init__(self):
+        self.bytes = 0
+
+async def save_user_info(user):
+    if not user:
+        return
+    try:
+        await ensure_db_connected()
+        await db.save_user({
+            "user_id": user.id,
+            "username": user.username,
+            "first_name": user.first_name,
+            "last_name": user.last_name
+        })
+    except Exception as e:
+        logger.error("Error saving user info: %s", e)
@@ -1,5 +1,6 @@
 import asyncpg
 import asyncio
+import time
 from typing import Optional, List, Dict, Any
 import os
 from datetime import datetime
@@ -9,6 +10,11 @@ class Database:
     def __init__(self):
         self.pool = None
         self.database_url = os.getenv('DATABASE_URL')
+        # File metadata is immutable after upload; a short TTL cache keeps
+        # hot lookups (inline buttons, /stream, /player) off the pool
+        self._file_cache = {}
+        self._file_cache_ttl = 900
+        self._file_cache_max = 4096
     
     async def connect(self):
         """Initialize database connection pool"""
@@ -68,6 +74,12 @@ class Database:
                 )
             """)
             
+            # Index so per-user listings don't scan the whole files table
+            await conn.execute("""
+                CREATE INDEX IF NOT EXISTS idx_files_uploader_date
+                ON files (uploader_id, upload_date DESC)
+            """)
+
             # Download links table for temporary access
             await conn.execute("""
                 CREATE TABLE IF NOT EXISTS download_links (
@@ -117,6 +129,20 @@ class Database:
                 return dict(row)
             return None
     
+    async def get_file_cached(self, file_id: str) -> Optional[Dict[str, Any]]:
+        """get_file with a TTL cache, for read-only hot paths"""
+        entry = self._file_cache.get(file_id)
+        now = time.monotonic()
+        if entry and now < entry[0]:
+            return entry[1]
+
+        data = await self.get_file(file_id)
+        if data:
+            if len(self._file_cache) >= self._file_cache_max:
+                self._file_cache.clear()
+            self._file_cache[file_id] = (now + self._file_cache_ttl, data)
+        return data
+
     async def list_user_files(self, user_id: int, limit: int = 50, offset: int = 0) -> List[Dict[str, Any]]:
         """List files uploaded by a user"""
         async with self.pool.acquire() as conn:
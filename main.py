@@ -1,38 +1,69 @@
 import asyncio
 import os
+import signal
+import subprocess
 from datetime import datetime
 import uvicorn
-import multiprocessing
 import sys
+try:
+    import uvloop
+    uvloop.install()
+except ImportError:
+    uvloop = None
+
+try:
+    import httptools  # noqa: F401
+except ImportError:
+    httptools = None
+
+try:
+    # Pre-baked at deploy time by build_env_config.py — skips .env
+    # parsing. Must run before the imports below: the db/storage
+    # singletons read DATABASE_URL and WASABI_* at import time
+    import env_config  # noqa: F401
+except ImportError:
+    from dotenv import load_dotenv
+    load_dotenv()
+
 from web_app import app as web_app
 from database import db
 from wasabi_storage import storage
-from dotenv import load_dotenv
 
-load_dotenv()
+async def start_bot_process():
+    """Start the Telegram bot as a direct child process"""
+    print("🤖 Starting Telegram File Bot...")
+    log_path = os.path.join(os.path.dirname(__file__), "bot.log")
+    log_file = open(log_path, "a")
+    process = await asyncio.create_subprocess_exec(
+        sys.executable,
+        os.path.join(os.path.dirname(__file__), "simple_bot.py"),
+        stdout=log_file,
+        stderr=log_file
+    )
+    print("🚀 Telegram File Bot started! Logs: bot.log")
+    return process, log_file
 
-def run_bot_process():
-    """Run the Telegram bot as a separate process"""
+async def stop_bot_process(process):
+    """Stop the bot: SIGTERM first, SIGKILL after a grace period"""
+    if process.returncode is not None:
+        return
+    print("🛑 Stopping Telegram bot...")
+    timeout = int(os.getenv("SHUTDOWN_TIMEOUT", 30))
+    process.terminate()
     try:
-        print("🤖 Starting Telegram File Bot...")
-        print("🤖 Starting Telegram File Bot...")
-        log_path = os.path.join(os.path.dirname(__file__), "bot.log")
-        with open(log_path, "a") as log_file:
-            subprocess.Popen(
-                [sys.executable, os.path.join(os.path.dirname(__file__), "simple_bot.py")],
-                stdout=log_file,
-                stderr=log_file,
-                env=os.environ.copy()
-            )
-        print("🚀 Telegram File Bot started! Logs: bot.log")
-        process.wait()  # Wait for bot to exit
-    except Exception as e:
-        print(f"❌ Bot startup error: {e}")
+        await asyncio.wait_for(process.wait(), timeout=timeout)
+    except asyncio.TimeoutError:
+        process.kill()
+        await process.wait()
 
 async def main():
     """Main async entry point"""
     print("🚀 Starting Telegram File Bot services...")
 
+    # One bounded worker pool for all blocking calls in this process —
+    # no unbounded thread growth under concurrent transfers
+    asyncio.get_running_loop().set_default_executor(storage.executor)
+
     # Initialize database
     await db.connect()
     print("✅ Database connected")
@@ -44,8 +75,7 @@ async def main():
         print("⚠️ Wasabi storage connection failed")
 
     # Start bot in separate process
-    bot_process = multiprocessing.Process(target=run_bot_process, daemon=True)
-    bot_process.start()
+    bot_process, bot_log = await start_bot_process()
 
     # Start Uvicorn web server
     port = int(os.getenv("PORT", 5000))
@@ -54,17 +84,63 @@ async def main():
         host="0.0.0.0",
         port=port,
         log_level="info",
-        reload=False
+        reload=False,
+        loop="uvloop" if uvloop else "asyncio",
+        http="httptools" if httptools else "h11"
     )
     server = uvicorn.Server(config)
+
+    # On SIGTERM/SIGINT ask uvicorn to drain instead of dying mid-request;
+    # the finally block then gives the bot its own grace period, so
+    # in-flight Wasabi uploads can finish on Render redeploys
+    loop = asyncio.get_running_loop()
+
+    def request_shutdown():
+        server.should_exit = True
+
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        try:
+            loop.add_signal_handler(sig, request_shutdown)
+        except NotImplementedError:
+            pass  # e.g. Windows event loop
+
     try:
         await server.serve()
     finally:
-        # Terminate bot if web server stops
-        if bot_process.is_alive():
+        # Stop bot if web server stops
+        await stop_bot_process(bot_process)
+        bot_log.close()
+
+def run_web_workers(workers):
+    """Run uvicorn with multiple workers; it owns the main process, so the
+    bot runs alongside as a plain subprocess"""
+    log_path = os.path.join(os.path.dirname(__file__), "bot.log")
+    with open(log_path, "a") as log_file:
+        bot = subprocess.Popen(
+            [sys.executable, os.path.join(os.path.dirname(__file__), "simple_bot.py")],
+            stdout=log_file,
+            stderr=log_file
+        )
+    print(f"🚀 Telegram File Bot started! Logs: bot.log (web workers: {workers})")
+    try:
+        uvicorn.run(
+            "web_app:app",
+            host="0.0.0.0",
+            port=int(os.getenv("PORT", 5000)),
+            log_level="info",
+            workers=workers,
+            loop="uvloop" if uvloop else "asyncio",
+            http="httptools" if httptools else "h11"
+        )
+    finally:
+        if bot.poll() is None:
             print("🛑 Stopping Telegram bot...")
-            bot_process.terminate()
-            bot_process.join()
+            bot.terminate()
+            try:
+                bot.wait(timeout=int(os.getenv("SHUTDOWN_TIMEOUT", 30)))
+            except subprocess.TimeoutExpired:
+                bot.kill()
+                bot.wait()
 
 def run_main():
     print("=" * 50)
@@ -79,7 +155,8 @@ def run_main():
         'WASABI_ACCESS_KEY', 'WASABI_SECRET_KEY', 'WASABI_BUCKET',
         'DATABASE_URL'
     ]
-    missing = [v for v in required_vars if not os.getenv(v)]
+    env = os.environ
+    missing = [v for v in required_vars if not env.get(v)]
     if missing:
         print("❌ Missing required environment variables:")
         for var in missing:
@@ -88,7 +165,13 @@ def run_main():
 
     # Run main async function
     try:
-        asyncio.run(main())
+        workers = int(os.getenv("WEB_WORKERS", "1"))
+        if workers > 1:
+            # Stateless web app scales linearly; uvicorn manages the
+            # worker processes itself in this mode
+            run_web_workers(workers)
+        else:
+            asyncio.run(main())
     except KeyboardInterrupt:
         print("\n🛑 Shutting down services...")
     except Exception as e:
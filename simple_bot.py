@@ -10,19 +10,40 @@ Features:
 - Full metadata storage
 """
 import os
-import uuid
-import tempfile
+import re
+import secrets
 import asyncio
+import time
 import mimetypes
 import logging
 from datetime import datetime
 
+try:
+    import uvloop
+    uvloop.install()
+except ImportError:
+    pass
+
 from pyrogram import Client, filters
 from pyrogram.types import Message, InlineKeyboardMarkup, InlineKeyboardButton
 from pyrogram.enums import ChatAction
 
+try:
+    # Pre-baked at deploy time by build_env_config.py. Must run before
+    # the database/storage/bot_utils imports below: their singletons
+    # read DATABASE_URL, WASABI_* and PUBLIC_DOMAIN at import time
+    import env_config  # noqa: F401
+except ImportError:
+    pass
+
 from database import db
 from wasabi_storage import storage
+from bot_utils import (
+    DOMAIN_PREFIX as _DOMAIN_PREFIX,
+    ensure_db_connected,
+    format_file_size,
+    save_user_info,
+)
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("filebot")
@@ -32,8 +53,6 @@ API_ID = int(os.getenv("API_ID", 0))
 API_HASH = os.getenv("API_HASH", "")
 BOT_TOKEN = os.getenv("BOT_TOKEN", "")
 ADMIN_USER_ID = int(os.getenv("ADMIN_USER_ID", 0))
-PUBLIC_DOMAIN = os.getenv("PUBLIC_DOMAIN")  # e.g., mybot.onrender.com
-
 if not all([API_ID, API_HASH, BOT_TOKEN]):
     logger.error("Missing required environment variables")
     exit(1)
@@ -47,39 +66,71 @@ app = Client(
 )
 
 # ===== UTILS =====
-def format_file_size(size_bytes: int) -> str:
-    if not size_bytes:
-        return "0B"
-    size_names = ["B", "KB", "MB", "GB", "TB"]
-    i = 0
-    size = float(size_bytes)
-    while size >= 1024 and i < len(size_names) - 1:
-        size /= 1024
-        i += 1
-    return f"{size:.1f}{size_names[i]}"
-
-async def ensure_db_connected():
-    if not getattr(db, "pool", None):
-        await db.connect()
-
-async def save_user_info(user):
-    if not user:
-        return
-    try:
-        await ensure_db_connected()
-        await db.save_user({
-            "user_id": user.id,
-            "username": user.username,
-            "first_name": user.first_name,
-            "last_name": user.last_name
-        })
-    except Exception as e:
-        logger.error("Error saving user info: %s", e)
+# Covers the extensions the bot actually sees; mimetypes (which parses
+# /etc/mime.types on first use) is only consulted on a miss
+_EXT_MIME = {
+    ".mp4": "video/mp4",
+    ".mkv": "video/x-matroska",
+    ".avi": "video/x-msvideo",
+    ".mov": "video/quicktime",
+    ".webm": "video/webm",
+    ".mp3": "audio/mpeg",
+    ".m4a": "audio/mp4",
+    ".flac": "audio/flac",
+    ".ogg": "audio/ogg",
+    ".wav": "audio/x-wav",
+    ".jpg": "image/jpeg",
+    ".jpeg": "image/jpeg",
+    ".png": "image/png",
+    ".gif": "image/gif",
+    ".webp": "image/webp",
+    ".pdf": "application/pdf",
+    ".zip": "application/zip",
+    ".rar": "application/vnd.rar",
+    ".7z": "application/x-7z-compressed",
+    ".txt": "text/plain",
+    ".apk": "application/vnd.android.package-archive",
+}
+
+def _fast_mime(file_name: str):
+    ext = os.path.splitext(file_name)[1].lower()
+    return _EXT_MIME.get(ext) or mimetypes.guess_type(file_name)[0]
+
+# ===== FILTERS =====
+# Built once at import instead of per-decorator evaluation
+_FILE_FILTER = filters.document | filters.video | filters.audio | filters.photo
+
+_CMD_RE = re.compile(r"^/(start|web|list|help)\b")
+
+def _is_plain_text(_, __, message):
+    # Fast path: anything not starting with '/' skips matching entirely;
+    # known commands are rejected by one C-level regex match
+    text = message.text
+    if not text:
+        return False
+    return text[0] != "/" or not _CMD_RE.match(text)
+
+_NOT_COMMAND = filters.create(_is_plain_text)
+
+# ===== STATIC REPLIES =====
+# Depend only on PUBLIC_DOMAIN, so build them once at import
+_WELCOME_TEXT = (
+    "🚀 **TURBO FILE BOT**\n\n"
+    "Send any file and get instant high-speed upload 🚀"
+)
 
-def get_domain_url(path: str = "") -> str:
-    if not PUBLIC_DOMAIN:
-        return None
-    return f"https://{PUBLIC_DOMAIN}{path}"
+_start_buttons = [
+    [InlineKeyboardButton("📤 Upload File", callback_data="upload_help")],
+    [InlineKeyboardButton("📁 My Files", callback_data="list_files")]
+]
+if _DOMAIN_PREFIX:
+    _start_buttons.append([InlineKeyboardButton("🌐 Web Interface", url=_DOMAIN_PREFIX)])
+_START_KEYBOARD = InlineKeyboardMarkup(_start_buttons)
+
+_HELP_TEXT = (
+    "📖 Send any file to upload.\n"
+    "Commands:\n/start - Welcome\n/list - Your files\n/web - Web interface\n/help - This message"
+)
 
 # ===== COMMANDS =====
 @app.on_message(filters.command("init_db"))
@@ -95,31 +146,22 @@ async def init_db(client, message: Message):
 @app.on_message(filters.command("start"))
 async def start_command(client, message: Message):
     await save_user_info(message.from_user)
-    welcome_text = (
-        "🚀 **TURBO FILE BOT**\n\n"
-        "Send any file and get instant high-speed upload 🚀"
-    )
-
-    buttons = [
-        [InlineKeyboardButton("📤 Upload File", callback_data="upload_help")],
-        [InlineKeyboardButton("📁 My Files", callback_data="list_files")]
-    ]
-    domain_url = get_domain_url()
-    if domain_url:
-        buttons.append([InlineKeyboardButton("🌐 Web Interface", url=domain_url)])
-    keyboard = InlineKeyboardMarkup(buttons)
-    await message.reply_text(welcome_text, reply_markup=keyboard)
+    await message.reply_text(_WELCOME_TEXT, reply_markup=_START_KEYBOARD)
 
 @app.on_message(filters.command("web"))
 async def web_command(client, message: Message):
-    domain_url = get_domain_url()
+    domain_url = _DOMAIN_PREFIX
     if domain_url:
         await message.reply_text(f"🌐 **Web Interface:** {domain_url}")
     else:
         await message.reply_text("Web interface not configured. Set PUBLIC_DOMAIN env variable.")
 
 # ===== FILE HANDLER =====
-@app.on_message(filters.document | filters.video | filters.audio | filters.photo)
+# Bound simultaneous uploads so a burst of users can't exhaust the S3
+# connection pool or buffer memory
+_UPLOAD_SEM = asyncio.Semaphore(int(os.getenv("MAX_CONCURRENT_UPLOADS", "4")))
+
+@app.on_message(_FILE_FILTER)
 async def handle_file(client, message: Message):
     await client.send_chat_action(message.chat.id, ChatAction.UPLOAD_DOCUMENT)
 
@@ -138,43 +180,76 @@ async def handle_file(client, message: Message):
         return
 
     file_name = getattr(file_info, "file_name", f"media_{int(datetime.now().timestamp())}")
-    file_id = str(uuid.uuid4())
+    file_id = secrets.token_urlsafe(12)
     status_msg = await message.reply_text(f"🚀 Starting upload: {file_name}")
-    upload_start_time = datetime.now()
-    temp_path = None
+    upload_start = time.monotonic()  # monotonic: no wall-clock jumps, no object allocation
 
     try:
         await ensure_db_connected()
-        with tempfile.NamedTemporaryFile(delete=False) as temp_file:
-            await message.download(temp_file.name)
-            temp_path = temp_file.name
-
         wasabi_key = f"files/{file_id}/{file_name}"
         uploaded_bytes = 0
-        last_update = datetime.now()
 
         def progress_cb(bytes_transferred):
-            nonlocal uploaded_bytes, last_update
+            # May fire from boto3 threads or the loop; a bare int store is
+            # atomic under the GIL, so no locking or task scheduling here
+            nonlocal uploaded_bytes
             uploaded_bytes = bytes_transferred
-            now = datetime.now()
-            if (now - last_update).total_seconds() >= 2:
-                last_update = now
-                percent = uploaded_bytes / file_size * 100
-                elapsed = (now - upload_start_time).total_seconds()
+
+        async def progress_ticker():
+            # One task owns all status edits: at most one per second, no
+            # matter how fast chunks land, so Telegram never sees a burst
+            last_text = None
+            while True:
+                await asyncio.sleep(1)
+                if not uploaded_bytes:
+                    continue
+                percent = uploaded_bytes / file_size * 100 if file_size else 0
+                elapsed = time.monotonic() - upload_start
                 speed = uploaded_bytes / elapsed / 1024 / 1024 if elapsed > 0 else 0
                 remaining = file_size - uploaded_bytes
-                eta = remaining / (uploaded_bytes / elapsed) if uploaded_bytes > 0 else 0
+                eta = remaining / (uploaded_bytes / elapsed) if uploaded_bytes > 0 and elapsed > 0 else 0
                 eta_text = f"{int(eta)}s" if eta < 60 else f"{int(eta/60)}m {int(eta%60)}s"
-                asyncio.create_task(
-                    status_msg.edit_text(
-                        f"🚀 Uploading: {file_name}\n"
-                        f"📊 {percent:.1f}%\n"
-                        f"⚡ Speed: {speed:.1f} MB/s\n"
-                        f"⏱ ETA: {eta_text}"
-                    )
+                text = (
+                    f"🚀 Uploading: {file_name}\n"
+                    f"📊 {percent:.1f}%\n"
+                    f"⚡ Speed: {speed:.1f} MB/s\n"
+                    f"⏱ ETA: {eta_text}"
                 )
-
-        success = await storage.upload_file(temp_path, wasabi_key, progress_cb)
+                if text == last_text:
+                    continue
+                last_text = text
+                try:
+                    await status_msg.edit_text(text)
+                except Exception:
+                    pass  # never let a failed edit kill the upload
+
+        async with _UPLOAD_SEM:
+            ticker = asyncio.create_task(progress_ticker())
+            try:
+                if file_size and file_size < 64 * 1024 * 1024:
+                    # Small/medium files stay entirely in RAM: one in-memory
+                    # download, then a single PUT (below the 100MB multipart
+                    # threshold in the shared transfer config)
+                    buf = await message.download(in_memory=True)
+                    buf.seek(0)
+                    success = await storage.upload_stream(
+                        buf, wasabi_key, getattr(file_info, "mime_type", None),
+                        progress_cb
+                    )
+                else:
+                    # Pipe Telegram download chunks straight into the
+                    # multipart upload — no temp file, one pass over the bytes
+                    success = await storage.upload_from_chunks(
+                        client.stream_media(message), wasabi_key, progress_cb
+                    )
+            finally:
+                # Make sure no edit is still in flight before the final
+                # completion/error edit below
+                ticker.cancel()
+                try:
+                    await ticker
+                except asyncio.CancelledError:
+                    pass
         if success:
             file_data = {
                 "file_id": file_id,
@@ -182,7 +257,7 @@ async def handle_file(client, message: Message):
                 "wasabi_key": wasabi_key,
                 "original_name": file_name,
                 "file_size": file_size,
-                "mime_type": getattr(file_info, "mime_type", mimetypes.guess_type(file_name)[0]),
+                "mime_type": getattr(file_info, "mime_type", None) or _fast_mime(file_name),
                 "uploader_id": message.from_user.id,
                 "uploader_username": message.from_user.username,
                 "metadata": {
@@ -195,7 +270,7 @@ async def handle_file(client, message: Message):
 
             # Buttons
             buttons = [[InlineKeyboardButton("📥 Download", callback_data=f"download_{file_id}")]]
-            domain_url = get_domain_url()
+            domain_url = _DOMAIN_PREFIX
             if domain_url:
                 buttons.append([
                     InlineKeyboardButton("🌐 View Web", url=f"{domain_url}/stream/{file_id}"),
@@ -204,7 +279,7 @@ async def handle_file(client, message: Message):
                 buttons.append([InlineKeyboardButton("📱 MX Player", callback_data=f"mx_{file_id}")])
             keyboard = InlineKeyboardMarkup(buttons)
 
-            total_time = (datetime.now() - upload_start_time).total_seconds()
+            total_time = time.monotonic() - upload_start
             avg_speed = file_size / total_time / 1024 / 1024 if total_time > 0 else 0
             await status_msg.edit_text(
                 f"✅ Upload complete: {file_name}\n"
@@ -217,9 +292,6 @@ async def handle_file(client, message: Message):
     except Exception as e:
         await status_msg.edit_text(f"❌ Error: {str(e)}")
         logger.exception("Upload error")
-    finally:
-        if temp_path and os.path.exists(temp_path):
-            os.unlink(temp_path)
 
 # ===== LIST FILES =====
 @app.on_message(filters.command("list"))
@@ -231,67 +303,88 @@ async def list_files_command(client, message: Message):
             await message.reply_text("📁 No files uploaded yet.")
             return
 
-        text = "📁 Your Uploaded Files:\n\n"
+        parts = ["📁 Your Uploaded Files:\n"]
         for i, fdata in enumerate(files, 1):
-            upload_date = getattr(fdata.get("upload_date"), "strftime", lambda x: "N/A")("%Y-%m-%d %H:%M")
-            text += f"{i}. {fdata['original_name']} ({format_file_size(fdata['file_size'])}) - {upload_date}\n"
-        await message.reply_text(text)
+            upload_date = fdata.get("upload_date")
+            date_str = upload_date.strftime("%Y-%m-%d %H:%M") if upload_date else "N/A"
+            parts.append(f"{i}. {fdata['original_name']} ({format_file_size(fdata['file_size'])}) - {date_str}")
+        await message.reply_text("\n".join(parts))
     except Exception as e:
         await message.reply_text(f"❌ Error: {str(e)}")
         logger.exception("List files error")
 
 # ===== CALLBACKS =====
+async def _cb_upload_help(client, callback_query, rest):
+    await callback_query.message.reply_text("📤 Send a file to upload. Supports documents, videos, audio, photos.")
+
+async def _cb_list_files(client, callback_query, rest):
+    await list_files_command(client, callback_query.message)
+
+async def _cb_download(client, callback_query, file_id):
+    try:
+        await ensure_db_connected()
+        file_data = await db.get_file_cached(file_id)
+        if not file_data:
+            await callback_query.answer("File not found!", show_alert=True)
+            return
+        download_url = storage.generate_presigned_url(file_data["wasabi_key"], expiration=3600)
+        keyboard = InlineKeyboardMarkup([[InlineKeyboardButton("📥 Download Now", url=download_url)]])
+        await callback_query.message.reply_text(f"Download {file_data['original_name']}:", reply_markup=keyboard)
+    except Exception as e:
+        await callback_query.answer(f"Error: {str(e)}", show_alert=True)
+
+async def _cb_mx(client, callback_query, file_id):
+    try:
+        await ensure_db_connected()
+        file_data = await db.get_file_cached(file_id)
+        if not file_data:
+            await callback_query.answer("File not found!", show_alert=True)
+            return
+        mx_url = storage.get_mx_player_url(file_data["wasabi_key"], file_data["original_name"])
+        keyboard = InlineKeyboardMarkup([[InlineKeyboardButton("📱 Open in MX Player", url=mx_url)]])
+        await callback_query.message.reply_text(
+            f"📱 MX Player Ready: {file_data['original_name']}", reply_markup=keyboard
+        )
+    except Exception as e:
+        await callback_query.answer(f"Error: {str(e)}", show_alert=True)
+
+# Dispatch table: exact callback_data first, then the prefix before the
+# first underscore (the remainder is the file_id)
+_CALLBACK_HANDLERS = {
+    "upload_help": _cb_upload_help,
+    "list_files": _cb_list_files,
+    "download": _cb_download,
+    "mx": _cb_mx,
+}
+
 @app.on_callback_query()
 async def handle_callback(client, callback_query):
     data = callback_query.data
     await callback_query.answer()
 
-    if data == "upload_help":
-        await callback_query.message.reply_text("📤 Send a file to upload. Supports documents, videos, audio, photos.")
-    elif data == "list_files":
-        await list_files_command(client, callback_query.message)
-    elif data.startswith("download_"):
-        file_id = data.replace("download_", "")
-        try:
-            await ensure_db_connected()
-            file_data = await db.get_file(file_id)
-            if not file_data:
-                await callback_query.answer("File not found!", show_alert=True)
-                return
-            download_url = storage.generate_presigned_url(file_data["wasabi_key"], expiration=3600)
-            keyboard = InlineKeyboardMarkup([[InlineKeyboardButton("📥 Download Now", url=download_url)]])
-            await callback_query.message.reply_text(f"Download {file_data['original_name']}:", reply_markup=keyboard)
-        except Exception as e:
-            await callback_query.answer(f"Error: {str(e)}", show_alert=True)
-    elif data.startswith("mx_"):
-        file_id = data.replace("mx_", "")
-        try:
-            await ensure_db_connected()
-            file_data = await db.get_file(file_id)
-            if not file_data:
-                await callback_query.answer("File not found!", show_alert=True)
-                return
-            mx_url = storage.get_mx_player_url(file_data["wasabi_key"], file_data["original_name"])
-            keyboard = InlineKeyboardMarkup([[InlineKeyboardButton("📱 Open in MX Player", url=mx_url)]])
-            await callback_query.message.reply_text(
-                f"📱 MX Player Ready: {file_data['original_name']}", reply_markup=keyboard
-            )
-        except Exception as e:
-            await callback_query.answer(f"Error: {str(e)}", show_alert=True)
+    handler = _CALLBACK_HANDLERS.get(data)
+    if handler:
+        await handler(client, callback_query, "")
+        return
+
+    prefix, _, rest = data.partition("_")
+    handler = _CALLBACK_HANDLERS.get(prefix)
+    if handler:
+        await handler(client, callback_query, rest)
 
 # ===== HELP & TEXT =====
 @app.on_message(filters.command("help"))
 async def help_command(client, message: Message):
-    await message.reply_text(
-        "📖 Send any file to upload.\n"
-        "Commands:\n/start - Welcome\n/list - Your files\n/web - Web interface\n/help - This message"
-    )
+    await message.reply_text(_HELP_TEXT)
 
-@app.on_message(filters.text & ~filters.command(["start","web","list","help"]))
+@app.on_message(filters.text & _NOT_COMMAND)
 async def handle_text(client, message: Message):
     await message.reply_text("Send a file to upload. Use /help for commands.")
 
 # ===== MAIN =====
 if __name__ == "__main__":
     logger.info("🚀 Starting Telegram File Bot (Render.com ready)...")
+    # Share the storage worker pool for all default executor jobs so the
+    # bot process keeps a single bounded set of threads
+    asyncio.get_event_loop().set_default_executor(storage.executor)
     app.run()
@@ -1,7 +1,13 @@
 import boto3
 import aiofiles
 import asyncio
+import functools
+import threading
+import time
 from botocore.config import Config
+from boto3.s3.transfer import TransferConfig
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from typing import Optional, BinaryIO, AsyncIterator
 import os
 from datetime import datetime, timedelta
@@ -18,7 +24,7 @@ class WasabiStorage:
         
         self.config = Config(
             region_name=self.region,
-            retries={'max_attempts': 3},
+            retries={'max_attempts': 3, 'mode': 'adaptive'},
             max_pool_connections=100,  # Increased for faster transfers
             read_timeout=300,  # 5 minutes for large files
             connect_timeout=60,
@@ -32,14 +38,56 @@ class WasabiStorage:
             aws_secret_access_key=self.secret_key,
             config=self.config
         )
-    
+
+        # Dedicated bounded executor so blocking S3 calls never run on the
+        # default asyncio pool and starve Pyrogram's event loop
+        self.executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix='wasabi')
+        self.max_part_concurrency = 4
+
+        # Shared transfer config; "auto" engages the C-based AWS CRT client
+        # when awscrt is installed, sidestepping the GIL during transfers
+        transfer_kwargs = dict(
+            multipart_threshold=100 * 1024 * 1024,
+            multipart_chunksize=25 * 1024 * 1024,
+            max_concurrency=8
+        )
+        try:
+            self.transfer_config = TransferConfig(
+                preferred_transfer_client='auto', **transfer_kwargs
+            )
+        except TypeError:
+            # Older boto3 without CRT support
+            self.transfer_config = TransferConfig(**transfer_kwargs)
+
+        # Presigned URLs stay valid for their full expiration; cache them in
+        # coarse time buckets so repeated clicks skip SigV4 signing
+        self._url_cache = OrderedDict()
+        self._url_cache_max = 2048
+
+    def _cached_url(self, cache_key):
+        """Look up a previously signed URL (LRU order maintained)"""
+        url = self._url_cache.get(cache_key)
+        if url is not None:
+            self._url_cache.move_to_end(cache_key)
+        return url
+
+    def _store_url(self, cache_key, url):
+        """Store a signed URL, evicting the oldest entry when full"""
+        self._url_cache[cache_key] = url
+        if len(self._url_cache) > self._url_cache_max:
+            self._url_cache.popitem(last=False)
+
+    async def _run(self, func, *args, **kwargs):
+        """Run a blocking S3 call on the dedicated executor"""
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(
+            self.executor, functools.partial(func, *args, **kwargs)
+        )
+
     async def test_connection(self) -> bool:
         """Test Wasabi connection"""
         try:
-            loop = asyncio.get_event_loop()
-            response = await loop.run_in_executor(
-                None, lambda: self.client.head_bucket(Bucket=self.bucket_name)
-            )
+            await self._run(self.client.head_bucket, Bucket=self.bucket_name)
             return True
         except Exception as e:
             print(f"Wasabi connection test failed: {e}")
@@ -49,7 +97,6 @@ class WasabiStorage:
                          progress_callback=None) -> bool:
         """Fast chunked upload to Wasabi storage"""
         try:
-            import os
             file_size = os.path.getsize(file_path)
             
             # Use multipart upload for files larger than 100MB for better speed
@@ -64,116 +111,214 @@ class WasabiStorage:
     
     async def _single_upload(self, file_path: str, key: str, progress_callback=None):
         """Fast single file upload"""
+        # boto3's Callback reports per-chunk deltas from its worker
+        # threads; fold them into a running total under a lock so every
+        # upload path hands callers the same thing — cumulative bytes
+        lock = threading.Lock()
+        uploaded_bytes = 0
+
         def upload_callback(bytes_transferred):
+            nonlocal uploaded_bytes
+            with lock:
+                uploaded_bytes += bytes_transferred
+                total = uploaded_bytes
             if progress_callback:
-                progress_callback(bytes_transferred)
-        
-        loop = asyncio.get_event_loop()
-        await loop.run_in_executor(
-            None, 
-            lambda: self.client.upload_file(
-                file_path, 
-                self.bucket_name, 
-                key,
-                Callback=upload_callback,
-                ExtraArgs={'StorageClass': 'STANDARD'}
-            )
+                progress_callback(total)
+
+        await self._run(
+            self.client.upload_file,
+            file_path,
+            self.bucket_name,
+            key,
+            Callback=upload_callback,
+            Config=self.transfer_config,
+            ExtraArgs={'StorageClass': 'STANDARD'}
         )
         return True
-    
+
     async def _multipart_upload(self, file_path: str, key: str, progress_callback=None):
         """High-speed multipart upload for large files"""
-        import os
-        from concurrent.futures import ThreadPoolExecutor
-        
         file_size = os.path.getsize(file_path)
-        chunk_size = 100 * 1024 * 1024  # 100MB chunks for maximum speed
-        
+        chunk_size = 25 * 1024 * 1024  # 25MB parts, uploaded concurrently
+
         # Initialize multipart upload
-        loop = asyncio.get_event_loop()
-        response = await loop.run_in_executor(
-            None,
-            lambda: self.client.create_multipart_upload(
-                Bucket=self.bucket_name,
-                Key=key,
-                StorageClass='STANDARD'
-            )
+        response = await self._run(
+            self.client.create_multipart_upload,
+            Bucket=self.bucket_name,
+            Key=key,
+            StorageClass='STANDARD'
         )
         upload_id = response['UploadId']
-        
-        try:
-            parts = []
-            uploaded_bytes = 0
-            
-            with open(file_path, 'rb') as f:
-                part_number = 1
-                
-                while True:
-                    chunk = f.read(chunk_size)
-                    if not chunk:
-                        break
-                    
-                    # Upload chunk asynchronously
-                    response = await loop.run_in_executor(
-                        None,
-                        lambda c=chunk, pn=part_number: self.client.upload_part(
-                            Bucket=self.bucket_name,
-                            Key=key,
-                            PartNumber=pn,
-                            UploadId=upload_id,
-                            Body=c
-                        )
-                    )
-                    
-                    parts.append({
-                        'ETag': response['ETag'],
-                        'PartNumber': part_number
-                    })
-                    
-                    uploaded_bytes += len(chunk)
-                    if progress_callback:
-                        progress_callback(uploaded_bytes)
-                    
-                    part_number += 1
-            
-            # Complete multipart upload
-            await loop.run_in_executor(
-                None,
-                lambda: self.client.complete_multipart_upload(
+
+        semaphore = asyncio.Semaphore(self.max_part_concurrency)
+        uploaded_bytes = 0
+
+        async def upload_part(part_number: int, offset: int):
+            nonlocal uploaded_bytes
+            async with semaphore:
+                # Read the part asynchronously so disk I/O never occupies
+                # the S3 executor or blocks the event loop
+                async with aiofiles.open(file_path, 'rb') as f:
+                    await f.seek(offset)
+                    chunk = await f.read(chunk_size)
+                response = await self._run(
+                    self.client.upload_part,
                     Bucket=self.bucket_name,
                     Key=key,
+                    PartNumber=part_number,
                     UploadId=upload_id,
-                    MultipartUpload={'Parts': parts}
+                    Body=chunk
                 )
+                uploaded_bytes += len(chunk)
+                if progress_callback:
+                    progress_callback(uploaded_bytes)
+                return {
+                    'ETag': response['ETag'],
+                    'PartNumber': part_number
+                }
+
+        try:
+            # Upload parts concurrently, bounded by the semaphore
+            tasks = [
+                upload_part(part_number, offset)
+                for part_number, offset in enumerate(range(0, file_size, chunk_size), 1)
+            ]
+            parts = await asyncio.gather(*tasks)
+
+            # Complete multipart upload
+            await self._run(
+                self.client.complete_multipart_upload,
+                Bucket=self.bucket_name,
+                Key=key,
+                UploadId=upload_id,
+                MultipartUpload={'Parts': list(parts)}
             )
-            
+
             return True
-            
+
         except Exception as e:
             # Abort failed upload
-            await loop.run_in_executor(
-                None,
-                lambda: self.client.abort_multipart_upload(
+            await self._run(
+                self.client.abort_multipart_upload,
+                Bucket=self.bucket_name,
+                Key=key,
+                UploadId=upload_id
+            )
+            raise e
+    
+    async def upload_from_chunks(self, chunks: AsyncIterator[bytes], key: str,
+                                 progress_callback=None) -> bool:
+        """Stream chunks straight into a multipart upload (no temp file)"""
+        part_size = 25 * 1024 * 1024
+
+        response = await self._run(
+            self.client.create_multipart_upload,
+            Bucket=self.bucket_name,
+            Key=key,
+            StorageClass='STANDARD'
+        )
+        upload_id = response['UploadId']
+
+        # Parts upload in the background while the next one downloads;
+        # the semaphore bounds in-flight parts so buffered memory stays
+        # capped at concurrency × part_size
+        semaphore = asyncio.Semaphore(self.max_part_concurrency)
+        parts = []
+        part_number = 1
+        uploaded_bytes = 0
+        buffer = bytearray()
+        tasks = []
+
+        async def put_part(number, body):
+            nonlocal uploaded_bytes
+            try:
+                response = await self._run(
+                    self.client.upload_part,
                     Bucket=self.bucket_name,
                     Key=key,
-                    UploadId=upload_id
+                    PartNumber=number,
+                    UploadId=upload_id,
+                    Body=body
                 )
+                parts.append({
+                    'ETag': response['ETag'],
+                    'PartNumber': number
+                })
+                uploaded_bytes += len(body)
+                if progress_callback:
+                    progress_callback(uploaded_bytes)
+            finally:
+                semaphore.release()
+
+        async def start_part():
+            nonlocal part_number, buffer
+            await semaphore.acquire()
+            tasks.append(asyncio.create_task(put_part(part_number, buffer)))
+            part_number += 1
+            buffer = bytearray()
+
+        try:
+            async for chunk in chunks:
+                buffer += chunk
+                if len(buffer) >= part_size:
+                    await start_part()
+
+            # Flush the tail (or a single empty part for zero-byte files)
+            if buffer or part_number == 1:
+                await start_part()
+
+            await asyncio.gather(*tasks)
+            parts.sort(key=lambda part: part['PartNumber'])
+
+            await self._run(
+                self.client.complete_multipart_upload,
+                Bucket=self.bucket_name,
+                Key=key,
+                UploadId=upload_id,
+                MultipartUpload={'Parts': parts}
+            )
+            return True
+
+        except Exception as e:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            await self._run(
+                self.client.abort_multipart_upload,
+                Bucket=self.bucket_name,
+                Key=key,
+                UploadId=upload_id
             )
             raise e
-    
-    async def upload_stream(self, stream: BinaryIO, key: str, 
-                           content_type: str = None) -> bool:
+
+    async def upload_stream(self, stream: BinaryIO, key: str,
+                           content_type: str = None,
+                           progress_callback=None) -> bool:
         """Upload from stream to Wasabi storage"""
         try:
-            loop = asyncio.get_event_loop()
             extra_args = {}
             if content_type:
                 extra_args['ContentType'] = content_type
-            
-            await loop.run_in_executor(
-                None, 
-                self.client.upload_fileobj, 
-                stream, self.bucket_name, key, extra_args
+
+            # Same delta-to-cumulative fold as _single_upload, so all
+            # upload paths hand callers cumulative bytes
+            lock = threading.Lock()
+            uploaded_bytes = 0
+
+            def upload_callback(bytes_transferred):
+                nonlocal uploaded_bytes
+                with lock:
+                    uploaded_bytes += bytes_transferred
+                    total = uploaded_bytes
+                if progress_callback:
+                    progress_callback(total)
+
+            await self._run(
+                self.client.upload_fileobj,
+                stream, self.bucket_name, key,
+                ExtraArgs=extra_args,
+                Callback=upload_callback,
+                Config=self.transfer_config
             )
             return True
         except Exception as e:
@@ -188,9 +333,7 @@ class WasabiStorage:
                 if progress_callback:
                     progress_callback(bytes_transferred)
             
-            loop = asyncio.get_event_loop()
-            await loop.run_in_executor(
-                None,
+            await self._run(
                 self._download_file_sync,
                 key, file_path, download_callback
             )
@@ -205,15 +348,14 @@ class WasabiStorage:
             self.bucket_name,
             key,
             file_path,
-            Callback=callback
+            Callback=callback,
+            Config=self.transfer_config
         )
     
     async def get_download_stream(self, key: str) -> Optional[BinaryIO]:
         """Get download stream for a file"""
         try:
-            loop = asyncio.get_event_loop()
-            response = await loop.run_in_executor(
-                None,
+            response = await self._run(
                 self.client.get_object,
                 Bucket=self.bucket_name,
                 Key=key
@@ -227,6 +369,13 @@ class WasabiStorage:
                               response_content_disposition: str = None) -> str:
         """Generate high-speed presigned URL for file access"""
         try:
+            # 5-minute buckets: URLs are reused well within their lifetime
+            cache_key = (key, expiration, response_content_disposition,
+                         int(time.time() // 300))
+            cached = self._cached_url(cache_key)
+            if cached:
+                return cached
+
             params = {
                 'Bucket': self.bucket_name,
                 'Key': key
@@ -243,6 +392,7 @@ class WasabiStorage:
                 Params=params,
                 ExpiresIn=expiration
             )
+            self._store_url(cache_key, url)
             return url
         except Exception as e:
             print(f"Failed to generate presigned URL: {e}")
@@ -251,6 +401,13 @@ class WasabiStorage:
     def generate_streaming_url(self, key: str, expiration: int = 86400) -> str:
         """Generate high-performance streaming URL"""
         try:
+            # Same reuse window as presigned downloads: repeated Stream/MX/
+            # VLC clicks on a file shouldn't re-run SigV4 signing
+            cache_key = ('stream', key, expiration, int(time.time() // 300))
+            cached = self._cached_url(cache_key)
+            if cached:
+                return cached
+
             params = {
                 'Bucket': self.bucket_name,
                 'Key': key,
@@ -263,6 +420,7 @@ class WasabiStorage:
                 Params=params,
                 ExpiresIn=expiration
             )
+            self._store_url(cache_key, url)
             return url
         except Exception as e:
             print(f"Failed to generate streaming URL: {e}")
@@ -272,9 +430,7 @@ class WasabiStorage:
     async def delete_file(self, key: str) -> bool:
         """Delete file from Wasabi storage"""
         try:
-            loop = asyncio.get_event_loop()
-            await loop.run_in_executor(
-                None,
+            await self._run(
                 self.client.delete_object,
                 Bucket=self.bucket_name,
                 Key=key
@@ -287,9 +443,7 @@ class WasabiStorage:
     async def get_file_info(self, key: str) -> Optional[dict]:
         """Get file metadata from Wasabi"""
         try:
-            loop = asyncio.get_event_loop()
-            response = await loop.run_in_executor(
-                None,
+            response = await self._run(
                 self.client.head_object,
                 Bucket=self.bucket_name,
                 Key=key
@@ -58,7 +58,7 @@ async def download_by_link(link_id: str):
 @app.get("/stream/{file_id}")
 async def stream_file(file_id: str):
     """Stream file directly"""
-    file_data = await db.get_file(file_id)
+    file_data = await db.get_file_cached(file_id)
     
     if not file_data or not file_data['is_public']:
         raise HTTPException(status_code=404, detail="File not found")
@@ -71,7 +71,7 @@ async def stream_file(file_id: str):
 @app.get("/player/{file_id}")
 async def player_page(request: Request, file_id: str):
     """Video player page"""
-    file_data = await db.get_file(file_id)
+    file_data = await db.get_file_cached(file_id)
     
     if not file_data:
         raise HTTPException(status_code=404, detail="File not found")